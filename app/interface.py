@@ -1,19 +1,21 @@
+import threading
+
 import cv2
-from PySide6.QtCore import QTimer
-from PySide6.QtGui import QPixmap, QImage
-from PySide6.QtWidgets import QFileDialog
+from PySide6.QtCore import Qt, QTimer, QObject, Signal
 from app.view import MainWindow
 from app.model import ImageProcessingModel
-import numpy as np
-import os
-from typing import Optional
 
-class Interface:
+class Interface(QObject):
     """
     Model (画像管理) と View (GUI) の間の仲介役（Controller/Presenter）。
     カメラの初期化、QTimerによるライブフィード制御、ViewとModelの接続を担う。
     """
+
+    # 保存ワーカースレッドからGUIスレッドへ完了を通知するシグナル (成功フラグ, 保存パス)
+    save_finished = Signal(bool, str)
+
     def __init__(self, view: MainWindow, model: ImageProcessingModel):
+        super().__init__()
         # ModelとViewのインスタンスを参照として保持
         self.view = view
         self.model = model
@@ -30,22 +32,23 @@ class Interface:
         初期ロード時にGoogleロゴ画像 (images/google.png) を読み込み、Modelに設定する。
         """
         # プロジェクトルートからの相対パス ('images/google.png') を想定
-        image_path = 'images/google.png' 
-        google_img = cv2.imread(image_path)
-        
-        if google_img is None:
+        # （Model側で .npz キャッシュ経由の高速ロードが行われる）
+        image_path = 'images/google.png'
+
+        if not self.model.load_google_image(image_path):
             self.view.show_error_message(
-                "画像ロードエラー", 
+                "画像ロードエラー",
                 f"Googleロゴ画像 '{image_path}' が見つかりません。プロジェクトルートの 'images/google.png' を確認してください。"
             )
-        else:
-            self.model.set_google_image(google_img)
         
     def _setup_timer(self):
         """カメラフレーム取得のためのQTimerを設定する"""
         self.timer.timeout.connect(self.update_frame)
+        # 既定の CoarseTimer は±5ms程度のジッタがあり、短い更新間隔では
+        # コマ落ち/二重描画の原因になるため高精度タイマーを指定する
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         # Modelで定義されたフレーム間隔を使用
-        self.timer.setInterval(self.model.DELAY) 
+        self.timer.setInterval(self.model.DELAY)
         
     def _connect_signals(self):
         """Viewで定義されたシグナルを、Interfaceの処理メソッドに接続する。"""
@@ -54,6 +57,9 @@ class Interface:
         self.view.composite_requested.connect(self.handle_capture_and_composite)
         self.view.save_requested.connect(self.handle_save_image)
 
+        # 保存ワーカーからの完了通知（ワーカースレッド発行→GUIスレッドで受信）
+        self.save_finished.connect(self._on_save_finished)
+
     # ----------------------------------------------------
     # カメラライブフィード関連
     # ----------------------------------------------------
@@ -107,7 +113,12 @@ class Interface:
         """
         QTimerのタイムアウト時に呼ばれ、カメラからフレームを取得してViewに表示する。
         """
-        frame = self.model.get_frame_for_display() 
+        # 前回の描画以降に新しいフレームが来ていなければ何もしない
+        # （UI更新タイマーはカメラより速く回るため、古いフレームを描き直さない）
+        if not self.model.has_new_frame():
+            return
+
+        frame = self.model.get_frame_for_display()
         
         if frame is None:
             if self.is_live_feed:
@@ -117,16 +128,20 @@ class Interface:
                 self.view.show_status_message("フレーム取得失敗。カメラを停止しました。")
             return
 
-        # BGR (OpenCV) -> RGB に変換
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # QImage -> QPixmapに変換し、Viewに表示を指示
-        h, w, ch = frame_rgb.shape
-        bytes_per_line = ch * w
-        q_image = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_image)
-        
-        self.view.display_frame(pixmap)
+        # 表示先ラベルより大きいフレームは OpenCV 側で事前縮小してから渡す
+        # （Qtの汎用スケーラより cv2.resize(INTER_AREA) の方が速く、QImage も小さくなる）
+        lw, lh = self.view.display_target_size()
+        h, w, _ = frame.shape
+        if lw > 0 and lh > 0:
+            scale = min(lw / w, lh / h)
+            if scale < 1.0:
+                tw, th = max(1, int(w * scale)), max(1, int(h * scale))
+                small = cv2.resize(frame, (tw, th), interpolation=cv2.INTER_AREA)
+                self.view.display_bgr_frame(small, is_live=True, prescaled=True)
+                return
+
+        # ラベルの方が大きい場合は従来どおりQt側でスケーリングする
+        self.view.display_bgr_frame(frame, is_live=True)
         
     # ----------------------------------------------------
     # 画像合成・保存関連
@@ -144,26 +159,17 @@ class Interface:
         self.view.show_status_message("画像合成処理を実行中...")
 
         try:
-            # Modelに画像合成を依頼
+            # Modelに画像合成を依頼（失敗時は ValueError が送出される）
             composite_image = self.model.process_and_capture_composite_image()
-            
-            if isinstance(composite_image, np.ndarray):
-                
-                # BGR (OpenCV) -> RGB に変換し、Viewに表示を指示
-                image_rgb = cv2.cvtColor(composite_image, cv2.COLOR_BGR2RGB)
-                h, w, ch = image_rgb.shape
-                bytes_per_line = ch * w
-                q_image = QImage(image_rgb.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-                
-                self.view.display_frame(QPixmap.fromImage(q_image)) # <-- 合成画像を中央に表示
-                
-                # ライブフィードを停止し、フリーズ状態へ
-                self._stop_live_feed() 
-                
-                self.view.show_status_message("画像合成完了: 合成画像を中央に表示中。「再開」ボタンでライブに戻ります。")
-            else:
-                self.view.show_error_message("合成エラー", "画像合成処理に失敗しました。")
-                
+
+            # BGR 配列をそのまま View に渡して中央に表示（静止画なので高品質スケーリング）
+            self.view.display_bgr_frame(composite_image)
+
+            # ライブフィードを停止し、フリーズ状態へ
+            self._stop_live_feed()
+
+            self.view.show_status_message("画像合成完了: 合成画像を中央に表示中。「再開」ボタンでライブに戻ります。")
+
         except ValueError as e:
              self.view.show_error_message("処理エラー", str(e))
              
@@ -179,11 +185,34 @@ class Interface:
         
         if file_path:
             self.view.show_status_message(f"画像を '{file_path}' に保存中...")
-            
-            try:
-                if self.model.save_image(file_path):
-                    self.view.show_status_message(f"保存完了: {file_path}")
-                else:
-                    self.view.show_error_message("保存エラー", "ファイル書き込みに失敗しました。")
-            except ValueError as e:
-                self.view.show_error_message("保存エラー", str(e))
\ No newline at end of file
+
+            # PNGエンコードは数十〜数百msかかりGUIスレッドの描画/入力を止めるため、
+            # ワーカースレッドで実行する。多重起動を防ぐため保存アクションは一時無効化。
+            # 合成結果は使い回しの内部バッファで、保存中に再合成されると
+            # 書き出し中のピクセルが上書きされるため、ここでスナップショットを取って渡す
+            snapshot = self.model.get_captured_image().copy()
+            self.view.set_save_enabled(False)
+            threading.Thread(target=self._save_worker, args=(file_path, snapshot),
+                             daemon=True).start()
+
+    def _save_worker(self, file_path: str, image):
+        """
+        ワーカースレッド上で画像の書き出しを行い、結果をシグナルで通知する。
+
+        cv2.imwrite は拡張子が不明なパスで cv2.error を送出するなど
+        失敗の仕方が複数あるため、どんな例外でも握りつぶして失敗として通知し、
+        save_finished が必ず発行されるようにする（保存アクションの再有効化に必要）。
+        """
+        try:
+            success = self.model.save_image(file_path, image)
+        except Exception:
+            success = False
+        self.save_finished.emit(success, file_path)
+
+    def _on_save_finished(self, success: bool, file_path: str):
+        """保存完了シグナルを受け取り（GUIスレッド）、結果を表示する"""
+        self.view.set_save_enabled(True)
+        if success:
+            self.view.show_status_message(f"保存完了: {file_path}")
+        else:
+            self.view.show_error_message("保存エラー", "ファイル書き込みに失敗しました。")
\ No newline at end of file
@@ -1,16 +1,106 @@
+import os
+import threading
+import zipfile
+
 import numpy as np
 import cv2
 from typing import Optional
 
+# Numba はオプション依存。未インストールでもモジュールはロードでき、
+# 合成はベクトル化済みの OpenCV/NumPy パスにフォールバックする
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True)
+    def _composite_kernel(composite_img: np.ndarray, capture_img: np.ndarray) -> None:
+        """白色ピクセルをカメラフレームのタイリングで置き換える（composite_img を直接更新）"""
+        g_hight, g_width, _ = composite_img.shape
+        c_hight, c_width, _ = capture_img.shape
+        for y in numba.prange(g_hight):
+            for x in range(g_width):
+                # 3回の比較＋短絡評価の代わりに、チャンネル和が 255*3 かを1回だけ判定する
+                # （uint8 の範囲では和が 765 になるのは全チャンネル 255 のときのみ）
+                pix_sum = (np.uint16(composite_img[y, x, 0])
+                           + composite_img[y, x, 1]
+                           + composite_img[y, x, 2])
+                if pix_sum == 765:
+                    composite_img[y, x, 0] = capture_img[y % c_hight, x % c_width, 0]
+                    composite_img[y, x, 1] = capture_img[y % c_hight, x % c_width, 1]
+                    composite_img[y, x, 2] = capture_img[y % c_hight, x % c_width, 2]
+else:
+    _composite_kernel = None
+
+
+class FrameGrabber(threading.Thread):
+    """
+    カメラフレームを連続取得するプロデューサースレッド。
+
+    cap.read() はドライバがフレームを渡すまでブロックする（15〜30ms程度）ため、
+    GUIスレッドで呼ぶとイベントループが停止してしまう。
+    このスレッドが常に最新フレームを1枠だけ保持し（newest-wins）、
+    GUI側は get_latest() で取り出すだけにする。
+    """
+
+    def __init__(self, cap: cv2.VideoCapture):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # 最初のフレームが到着したことを通知するイベント（起動直後の空振り防止）
+        self._first_frame = threading.Event()
+        self._latest: Optional[np.ndarray] = None
+        # 到着フレームの通し番号（newest-wins: 消費側が新着の有無を判定するために使う）
+        self._seq: int = 0
+
+    def run(self):
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                # カメラが切断された場合はスレッドを終了する
+                break
+            with self._lock:
+                self._latest = frame
+                self._seq += 1
+            self._first_frame.set()
+
+    def current_seq(self) -> int:
+        """最後に到着したフレームの通し番号を返す"""
+        with self._lock:
+            return self._seq
+
+    def get_latest(self, timeout: Optional[float] = None) -> tuple:
+        """最新フレームへの参照と通し番号を返す（timeout指定時は初回フレームの到着を待つ）"""
+        if timeout is not None:
+            self._first_frame.wait(timeout)
+        with self._lock:
+            return self._latest, self._seq
+
+    def stop(self):
+        """取得ループに停止を指示する"""
+        self._stop_event.set()
+
+
 class ImageProcessingModel:
     """
     アプリケーションのデータ（画像）とビジネスロジックを担当するクラス。
     カメラフレームの取得、画像合成ロジック、画像データの保持を行う。
     Interface から設定されたカメラオブジェクトとロゴ画像を使用する。
+
+    注意: フレームごとのメモリ確保を避けるため、表示用・合成用の配列は
+    内部バッファを使い回して返す（貸し出し扱い）。呼び出し側は次の呼び出しまでに
+    表示（QPixmap化によるコピー）を済ませ、返された配列を保持・変更しないこと。
     """
     
-    # フレームごとの表示間隔（GUI側でQTimerに使用）
-    DELAY: int = 33 # 1000ms / 30fps
+    # GUIの表示更新間隔（GUI側でQTimerに使用）
+    # カメラ取得は FrameGrabber スレッドに分離済みなので、ここは画面更新の周期のみ
+    DELAY: int = 5
+
+    # カメラの取得解像度（Interface側の cap.set と一致させる固定値）
+    CAMERA_WIDTH: int = 640
+    CAMERA_HEIGHT: int = 480
 
     # ----------------------------------------------------
     # コンストラクタ: Modelはデータとロジックの提供に専念するため引数なし
@@ -22,20 +112,105 @@ class ImageProcessingModel:
         self.captured_composite_image: Optional[np.ndarray] = None 
         # OpenCVのビデオキャプチャオブジェクト（Interfaceから設定される）
         self.cap: Optional[cv2.VideoCapture] = None
+        # カメラ取得用のプロデューサースレッド（set_camera_object で起動）
+        self._grabber: Optional[FrameGrabber] = None
+        # 最後に表示用として消費したフレームの通し番号（新着判定に使用）
+        self._last_seen_seq: int = 0
+        # 表示用の反転済みフレームバッファ（初回フレームでサイズ確定後に確保し、使い回す）
+        self._flip_buf: Optional[np.ndarray] = None
+        # 合成結果用のバッファ（毎回 google_img.copy() で再確保せず使い回す）
+        self._composite_buf: Optional[np.ndarray] = None
+
+        # OpenCLが使える環境では、表示パイプライン（反転＋描画）を
+        # OpenCVのT-API(UMat)経由でiGPUに委譲する（合成はギャザー/スキャッタと
+        # NumbaカーネルのためCPUのまま）
+        try:
+            self._use_opencl: bool = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        except cv2.error:
+            self._use_opencl = False
         
         # 課題に必要なGoogleロゴ画像（背景画像）
         self.google_img: Optional[np.ndarray] = None
 
+        # 白色ピクセルの平坦インデックスと、対応するカメラ側の参照座標
+        # （set_google_image で一度だけ計算する）
+        self._white_flat_idx: Optional[np.ndarray] = None
+        self._src_y: Optional[np.ndarray] = None
+        self._src_x: Optional[np.ndarray] = None
+        # 参照座標テーブルが前提とするカメラフレームのサイズ (高さ, 幅)
+        self._src_shape: Optional[tuple] = None
+
     # ----------------------------------------------------
     # Interfaceから呼ばれる設定ロジック
     # ----------------------------------------------------
+    def load_google_image(self, image_path: str) -> bool:
+        """
+        Googleロゴ画像をファイルから読み込み、前計算済みテーブルごと内部に設定する。
+
+        ロゴと前計算テーブルは静的なので、PNGデコードと白色ピクセル走査の結果を
+        .npz にキャッシュし、キャッシュが元画像より新しければそれを読むだけで済ませる。
+        読み込みに成功したら True を返す。
+        """
+        cache_path = image_path + '.cache.npz'
+        try:
+            if (os.path.exists(cache_path)
+                    and os.path.getmtime(cache_path) >= os.path.getmtime(image_path)):
+                cache = np.load(cache_path)
+                self.google_img = cache['img']
+                self._white_flat_idx = cache['flat_idx']
+                self._src_y = cache['src_y']
+                self._src_x = cache['src_x']
+                self._src_shape = (self.CAMERA_HEIGHT, self.CAMERA_WIDTH)
+                return True
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # 壊れた/古い形式のキャッシュは無視して再生成する
+            # （np.load は切り詰められた zip で BadZipFile、zip 以外のゴミで ValueError を送出する）
+            pass
+
+        img_data = cv2.imread(image_path)
+        if img_data is None:
+            return False
+        self.set_google_image(img_data)
+
+        try:
+            # 書き込み途中で落ちても半端なキャッシュが残らないよう、
+            # 一時ファイルへ書いてからアトミックに差し替える
+            tmp_path = cache_path + '.tmp.npz'
+            np.savez(tmp_path,
+                     img=self.google_img,
+                     flat_idx=self._white_flat_idx,
+                     src_y=self._src_y,
+                     src_x=self._src_x)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass # キャッシュを書けなくても動作には支障がない
+        return True
+
     def set_google_image(self, img_data: np.ndarray):
         """InterfaceからGoogleロゴの画像データを受け取り、内部に保持する"""
         self.google_img = img_data
+        # ロゴはセッション中固定なので、白色ピクセルの位置はここで一度だけ計算する
+        # （合成のたびに全ピクセルを再スキャンしないため）。
+        # cv2.inRange は3チャンネルの比較とANDをSIMD化された1パスで行う
+        white = np.array([255, 255, 255], dtype=np.uint8)
+        white_mask = cv2.inRange(img_data, white, white)
+
+        # 白色ピクセルの平坦インデックスと、タイリング参照先のカメラ座標を前計算する
+        # （カメラ解像度は CAMERA_WIDTH x CAMERA_HEIGHT 固定なのでテーブルは不変）。
+        # 合成時はギャザー1回＋スキャッタ1回だけで済み、中間バッファが不要になる
+        g_hight, g_width, _ = img_data.shape
+        ys, xs = np.nonzero(white_mask)
+        self._white_flat_idx = ys * g_width + xs
+        self._src_y = ys % self.CAMERA_HEIGHT
+        self._src_x = xs % self.CAMERA_WIDTH
+        self._src_shape = (self.CAMERA_HEIGHT, self.CAMERA_WIDTH)
 
     def set_camera_object(self, cap_object: cv2.VideoCapture):
-        """Interfaceから初期化済みのカメラオブジェクトを受け取る"""
+        """Interfaceから初期化済みのカメラオブジェクトを受け取り、取得スレッドを起動する"""
         self.cap = cap_object
+        self._last_seen_seq = 0
+        self._grabber = FrameGrabber(cap_object)
+        self._grabber.start()
 
     # ----------------------------------------------------
     # カメラフレーム取得 ロジック
@@ -44,8 +219,26 @@ class ImageProcessingModel:
         """カメラがオープン状態かどうかを返す"""
         return self.cap is not None and self.cap.isOpened()
     
+    def has_new_frame(self) -> bool:
+        """
+        前回の表示用取得以降に新しいカメラフレームが到着しているかを返す。
+        GUI側はこれが False の間は再描画をスキップできる（古いフレームの再処理防止）。
+        """
+        if self._grabber is None:
+            return False
+        if not self._grabber.is_alive():
+            # 取得スレッドが終了している場合は True を返し、
+            # get_frame_for_display 側の失敗処理（フィード停止）へ進ませる
+            return True
+        return self._grabber.current_seq() != self._last_seen_seq
+
     def stop_capture(self):
         """カメラキャプチャを停止し、リソースを解放する"""
+        if self._grabber is not None:
+            # cap.release() より先にスレッドを止める（read中の解放を避ける）
+            self._grabber.stop()
+            self._grabber.join(timeout=1.0)
+            self._grabber = None
         if self.cap is not None and self.cap.isOpened():
             self.cap.release()
             self.cap = None
@@ -55,30 +248,50 @@ class ImageProcessingModel:
         カメラから最新のフレームを取得し、ターゲットマークを付加して返す。
         生フレームは self.current_live_frame に保存される。
         """
-        if not self.is_camera_open():
+        if not self.is_camera_open() or self._grabber is None:
             return None
 
-        ret, frame = self.cap.read()
-        if not ret:
+        # 取得スレッドが保持する最新フレームを取り出す（GUIスレッドはブロックしない。
+        # ただし起動直後のみ初回フレームの到着を短時間待つ）
+        frame, seq = self._grabber.get_latest(timeout=1.0)
+        if frame is None or not self._grabber.is_alive():
+            # フレーム未到着、または取得スレッドが終了している（カメラ喪失）
             return None
+        self._last_seen_seq = seq
 
         # 生フレームを内部状態として保存
         self.current_live_frame = frame
-        
+
         # ----------------------------------------------------
         # ライブフィード用：ターゲットマーク描画ロジック
         # ----------------------------------------------------
-        img = frame.copy()
-        h, w, _ = img.shape
+        # コピー→描画→反転の3パスではなく、確保済みバッファへ反転しながら書き込み、
+        # そのバッファに直接ターゲットマークを描画する（フレームあたり1パス）。
+        # 生フレーム（current_live_frame）は無加工のまま残る。
+        h, w, _ = frame.shape
         center = (w // 2, h // 2)
 
+        if self._use_opencl:
+            # OpenCLが使える場合: UMatに載せて反転と描画をデバイス側で実行し、
+            # 最後に一度だけCPUへ読み戻す
+            flipped = cv2.flip(cv2.UMat(frame), 1)
+            cv2.line(flipped, (center[0], center[1] - 80), (center[0], center[1] + 80), (0, 0, 255), 3)
+            cv2.line(flipped, (center[0] - 80, center[1]), (center[0] + 80, center[1]), (0, 0, 255), 3)
+            return flipped.get() # ターゲットマーク付きのフレームを返す
+
+        if self._flip_buf is None or self._flip_buf.shape != frame.shape:
+            self._flip_buf = np.empty_like(frame)
+
+        # 左右反転（dst指定でインプレース書き込み）
+        cv2.flip(frame, 1, dst=self._flip_buf)
+
+        img = self._flip_buf
+
         # 赤いターゲットマークを描画
-        img = cv2.line(img, (center[0], center[1] - 80), (center[0], center[1] + 80), (0, 0, 255), 3)
-        img = cv2.line(img, (center[0] - 80, center[1]), (center[0] + 80, center[1]), (0, 0, 255), 3)
+        cv2.line(img, (center[0], center[1] - 80), (center[0], center[1] + 80), (0, 0, 255), 3)
+        cv2.line(img, (center[0] - 80, center[1]), (center[0] + 80, center[1]), (0, 0, 255), 3)
 
-        # 左右反転
-        img = cv2.flip(img, flipCode=1)
-        
+        # 返すバッファは次のフレームで上書きされるため、呼び出し側は保持・変更しないこと
         return img # ターゲットマーク付きのフレームを返す
 
     # ----------------------------------------------------
@@ -94,20 +307,38 @@ class ImageProcessingModel:
         if capture_img is None or self.google_img is None:
             raise ValueError("Google画像またはカメラフレームがロードされていません。")
 
-        composite_img = self.google_img.copy() 
-        
-        g_hight, g_width, _ = composite_img.shape
-        c_hight, c_width, _ = capture_img.shape
-        
+        # 合成バッファを使い回し、ロゴ画像を上書きコピーして初期化する
+        # （.copy() による毎回のメモリ確保を避ける）
+        if self._composite_buf is None:
+            self._composite_buf = np.empty_like(self.google_img)
+        np.copyto(self._composite_buf, self.google_img)
+        composite_img = self._composite_buf
+
         # 課題の画像合成ロジック（白色置き換え）
-        for x in range(g_width):
-            for y in range(g_hight):
-                b, g, r = composite_img[y, x] 
-                
-                if (b, g, r) == (255, 255, 255):
-                    # カメラフレームをタイリングして使用（元のコードのロジックを再現）
-                    composite_img[y, x] = capture_img[y % c_hight, x % c_width]
-                    
+        if _composite_kernel is not None:
+            # Numba がある場合: 判定・タイリング・書き込みを融合した並列JITカーネル1パス
+            # （中間バッファ不要で、将来ピクセルごとの非一様な処理にも拡張しやすい）
+            _composite_kernel(composite_img, capture_img)
+        else:
+            # フォールバック: ベクトル化済みの NumPy パス。
+            # 白色ピクセルの位置とタイリング参照座標は set_google_image で計算済みなので、
+            # カメラからのギャザー1回＋合成先へのスキャッタ1回で完結する
+            # （タイリング画像のような中間バッファは作らない）。
+            # cap.set の解像度指定は努力目標で、想定と異なるサイズのフレームが
+            # 届くことがあるため、その場合は参照座標を実フレームに合わせて作り直す
+            c_hight, c_width, _ = capture_img.shape
+            if (c_hight, c_width) != self._src_shape:
+                g_width = self.google_img.shape[1]
+                ys = self._white_flat_idx // g_width
+                xs = self._white_flat_idx % g_width
+                self._src_y = ys % c_hight
+                self._src_x = xs % c_width
+                self._src_shape = (c_hight, c_width)
+
+            composite_img.reshape(-1, 3)[self._white_flat_idx] = \
+                capture_img[self._src_y, self._src_x]
+
+
         self.captured_composite_image = composite_img
         
         return composite_img
@@ -116,9 +347,18 @@ class ImageProcessingModel:
         """最後にキャプチャ/合成された画像を取得する"""
         return self.captured_composite_image
 
-    def save_image(self, file_path: str) -> bool:
-        """最後にキャプチャ/合成された画像（self.captured_composite_image）をファイルに保存する"""
-        if self.captured_composite_image is None:
+    def save_image(self, file_path: str, image: Optional[np.ndarray] = None) -> bool:
+        """
+        画像をファイルに保存する。
+
+        image が省略された場合は最後にキャプチャ/合成された画像
+        （self.captured_composite_image）を保存する。合成結果は使い回しの
+        内部バッファなので、別スレッドで保存する場合は呼び出し側が
+        事前にスナップショット（コピー）を渡すこと。
+        """
+        if image is None:
+            image = self.captured_composite_image
+        if image is None:
             raise ValueError("保存する画像がありません。")
 
-        return cv2.imwrite(file_path, self.captured_composite_image)
\ No newline at end of file
+        return cv2.imwrite(file_path, image)
\ No newline at end of file
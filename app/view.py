@@ -1,5 +1,6 @@
+import numpy as np
 from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QPixmap, QAction
+from PySide6.QtGui import QPixmap, QImage, QPainter, QAction
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QLabel, QPushButton,
     QVBoxLayout, QHBoxLayout, QFileDialog,
@@ -40,6 +41,15 @@ class MainWindow(QMainWindow):
         self._create_central_widget()
         self._create_status_bar()
 
+        # 表示用の永続バッファとそれを参照する QImage（初回フレームでサイズ確定後に確保）。
+        # QImage はデータを所有しないため、毎フレーム QImage を作り直す代わりに
+        # 同じバッファへピクセルをコピーし、同じ QImage ヘッダを使い回す
+        self._live_buf: Optional[np.ndarray] = None
+        self._live_qimage: Optional[QImage] = None
+        # 毎フレーム QPixmap.fromImage で作り直す代わりに、
+        # 永続 QPixmap へ QPainter で転写して使い回す
+        self._live_pixmap: Optional[QPixmap] = None
+
     # -------------------------
     # Actions, Toolbar, Layout (中略)
     # -------------------------
@@ -100,18 +110,65 @@ class MainWindow(QMainWindow):
     # View API (Controllerから呼ばれるメソッド)
     # -------------------------
 
-    def display_frame(self, pixmap: Optional[QPixmap]):
-        """Controller がカメラ映像や合成画像を表示するために呼び出す"""
+    def display_target_size(self) -> tuple:
+        """表示先ラベルの現在のサイズ (幅, 高さ) を返す（Controllerの事前縮小用）"""
+        size = self.image_label.size()
+        return size.width(), size.height()
+
+    def display_bgr_frame(self, frame: Optional[np.ndarray], is_live: bool = False,
+                          prescaled: bool = False):
+        """
+        Controller が OpenCV の BGR 配列をそのまま渡して表示するために呼び出す。
+
+        ピクセルは内部の永続バッファへコピーされるため、呼び出し側は
+        渡した配列を呼び出し後すぐに再利用してよい。
+        prescaled=True の場合、配列は既にラベルサイズに合わせて縮小済みとみなし、
+        Qt側のスケーリングを行わずそのまま表示する。
+        """
+        if frame is None:
+            self.display_frame(None)
+            return
+
+        h, w, _ = frame.shape
+        if self._live_buf is None or self._live_buf.shape != frame.shape:
+            self._live_buf = np.empty((h, w, 3), np.uint8)
+            self._live_qimage = QImage(self._live_buf.data, w, h, 3 * w,
+                                       QImage.Format.Format_BGR888)
+            self._live_pixmap = QPixmap(w, h)
+
+        np.copyto(self._live_buf, frame)
+
+        # QPixmap.fromImage による毎フレームの新規 QPixmap 生成を避け、
+        # 永続 QPixmap へ QPainter で転写する（転写コピー1回のみ）
+        painter = QPainter(self._live_pixmap)
+        painter.drawImage(0, 0, self._live_qimage)
+        painter.end()
+
+        if prescaled:
+            self.image_label.setPixmap(self._live_pixmap)
+            self.image_label.setText("")
+        else:
+            self.display_frame(self._live_pixmap, is_live=is_live)
+
+    def display_frame(self, pixmap: Optional[QPixmap], is_live: bool = False):
+        """
+        Controller がカメラ映像や合成画像を表示するために呼び出す。
+
+        is_live=True のライブプレビューは毎フレーム描き直されるため高速スケーリング、
+        静止表示（合成画像）のみ高品質なスムーズスケーリングを使う。
+        """
         if pixmap is None:
             self.image_label.clear()
             self.image_label.setText("撮影開始ボタンを押してカメラを起動してください")
             return
-        
+
         # ラベルのサイズに合わせて画像をスケーリング（アスペクト比を維持）
+        mode = (Qt.TransformationMode.FastTransformation if is_live
+                else Qt.TransformationMode.SmoothTransformation)
         scaled_pixmap = pixmap.scaled(
-            self.image_label.size(), 
-            Qt.AspectRatioMode.KeepAspectRatio, 
-            Qt.TransformationMode.SmoothTransformation
+            self.image_label.size(),
+            Qt.AspectRatioMode.KeepAspectRatio,
+            mode
         )
         self.image_label.setPixmap(scaled_pixmap)
         self.image_label.setText("") 
@@ -124,6 +181,10 @@ class MainWindow(QMainWindow):
         """撮影開始/停止ボタンのテキストを更新する"""
         self.capture_toggle_button.setText(text)
 
+    def set_save_enabled(self, enabled: bool):
+        """保存アクションの有効/無効を切り替える（保存処理の多重起動防止に使用）"""
+        self.act_save.setEnabled(enabled)
+
     # -------------------------
     # Controllerが使用するヘルパー
     # -------------------------